@@ -0,0 +1,37 @@
+def encode_bitfield(chunks):
+    """
+    Encodes a collection of chunk numbers as a compact bitfield, the same way
+    real BitTorrent clients announce their pieces: bit i (big-endian within
+    each byte) set means chunk i+1 is available. A 100k-chunk announce shrinks
+    from ~500 KB of ASCII numbers to ~12 KB this way.
+    PARAMETERS:
+    chunks: Iterable of 1-based chunk numbers the peer has.
+    RETURNS:
+    The bitfield as bytes (empty bytes when there are no chunks).
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return b""
+    bitfield = bytearray((max(chunks) + 7) // 8)
+    for chunk in chunks:
+        index = chunk - 1
+        bitfield[index >> 3] |= 0x80 >> (index & 7)
+    return bytes(bitfield)
+
+def decode_bitfield(bitfield):
+    """
+    Decodes a bitfield back into the list of 1-based chunk numbers it marks.
+    PARAMETERS:
+    bitfield: The bitfield bytes produced by encode_bitfield.
+    RETURNS:
+    Sorted list of chunk numbers.
+    """
+    chunks = []
+    for byte_index, byte in enumerate(bitfield):
+        if not byte:
+            continue  # Skip empty bytes without testing their bits
+        base = byte_index << 3
+        for bit in range(8):
+            if byte & (0x80 >> bit):
+                chunks.append(base + bit + 1)
+    return chunks
@@ -2,6 +2,7 @@ from peer import Peer
 from torrent_metadata import TorrentMetadata
 from piece_manager import PieceManager
 from hashing import verify_chunk
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 class TorrentClient:
@@ -12,6 +13,11 @@ class TorrentClient:
         self.metadata = TorrentMetadata(file_path, tracker_url)
         self.piece_manager = PieceManager(self.metadata.total_chunks)
         self.peers = []
+        self.download_path = f"reassembled_{os.path.basename(file_path)}"
+        self.download_fd = None  # fd of the single in-progress download file
+        # Two workers are enough to hide verification behind the next network
+        # receive (hashlib releases the GIL while hashing)
+        self.verify_pool = ThreadPoolExecutor(max_workers=2)
 
     def start(self):
         """
@@ -19,6 +25,7 @@ class TorrentClient:
         """
         # Load metadata and prepare peer
         self.metadata.load_metadata()
+        self.open_download_file()
         peer = Peer(self.peer_ip, self.file_path)
         self.peers.append(peer)
 
@@ -31,44 +38,66 @@ class TorrentClient:
     def download_missing_pieces(self):
         """
         Requests missing pieces based on rarest-first prioritization.
+        Verification runs on a small worker pool so hashing piece N overlaps
+        with receiving piece N+1 instead of stalling the network between
+        requests; results are settled at the end of the pass.
         """
+        pending = []  # (future, piece, data) for chunks being verified
+        requested = set()  # pieces already requested this pass but not yet marked complete
+
         for peer in self.peers:
             rarest_piece = self.piece_manager.get_rarest_piece()
-            if rarest_piece:
+            if rarest_piece and rarest_piece not in requested:
                 # Request chunk data and expected hash
                 chunk_data, expected_hash = peer.request_chunk_from_peer(rarest_piece)
 
-                if chunk_data and verify_chunk(chunk_data, expected_hash):
-                    # If verification succeeds, mark the piece as complete
-                    self.piece_manager.mark_piece_complete(rarest_piece)
-                    self.save_chunk_to_disk(chunk_data, rarest_piece)
-                    print(f"Downloaded and verified piece {rarest_piece} successfully")
+                if chunk_data:
+                    # Kick off verification and immediately move to the next request
+                    future = self.verify_pool.submit(verify_chunk, chunk_data, expected_hash)
+                    pending.append((future, rarest_piece, chunk_data))
+                    requested.add(rarest_piece)
                 else:
                     print(f"Failed to verify piece {rarest_piece}")
 
-    def save_chunk_to_disk(self, chunk_data, chunk_number):
+        for future, piece, chunk_data in pending:
+            if future.result():
+                # If verification succeeds, mark the piece as complete
+                self.piece_manager.mark_piece_complete(piece)
+                self.save_chunk_to_disk(chunk_data, piece)
+                print(f"Downloaded and verified piece {piece} successfully")
+            else:
+                print(f"Failed to verify piece {piece}")
+
+    def open_download_file(self):
         """
-        Saves a verified chunk to disk.
+        Opens (and preallocates) the single download file that all pieces are
+        written into. One file for the whole download means one inode and one
+        open/close pair, instead of one filesystem entry per 64 KB chunk.
         """
-        chunk_dir = "chunks"
-        if not os.path.exists(chunk_dir):
-            os.makedirs(chunk_dir)
+        part_path = self.download_path + ".part"
+        self.download_fd = os.open(part_path, os.O_RDWR | os.O_CREAT)
+        if self.metadata.total_size and hasattr(os, 'posix_fallocate'):
+            # Reserve the blocks up front so writes never have to extend the file
+            os.posix_fallocate(self.download_fd, 0, self.metadata.total_size)
 
-        chunk_path = os.path.join(chunk_dir, f"chunk_{chunk_number}.chunk")
-        with open(chunk_path, 'wb') as chunk_file:
-            chunk_file.write(chunk_data)
+    def save_chunk_to_disk(self, chunk_data, chunk_number):
+        """
+        Writes a verified piece into the download file at its final offset.
+        The chunk boundary is a protocol concept, not a storage layout, so a
+        single pwrite at (chunk_number - 1) * chunk_size replaces the old
+        one-file-per-chunk open/write/close triple.
+        """
+        os.pwrite(self.download_fd, chunk_data, (chunk_number - 1) * self.metadata.chunk_size)
 
     def reassemble_file(self):
         """
-        Reassembles downloaded pieces into the original file once all pieces are complete.
+        Finalizes the download. Every piece was already written at its final
+        offset, so this is just a close and an atomic rename of the .part file.
         """
-        output_file = f"reassembled_{os.path.basename(self.file_path)}"
-        with open(output_file, 'wb') as final_file:
-            for i in range(1, self.metadata.total_chunks + 1):
-                chunk_path = os.path.join("chunks", f"chunk_{i}.chunk")
-                with open(chunk_path, 'rb') as chunk_file:
-                    final_file.write(chunk_file.read())
-        print(f"File reassembly complete. Saved as {output_file}")
+        os.close(self.download_fd)
+        self.download_fd = None
+        os.replace(self.download_path + ".part", self.download_path)
+        print(f"File reassembly complete. Saved as {self.download_path}")
 
 if __name__ == "__main__":
     peer_ip = "127.0.0.1"  # Replace with actual IP
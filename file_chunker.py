@@ -1,8 +1,11 @@
 import os
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
 CHUNK_SIZE = 64 * 1024 ## just keeping the chunk size at 64 KB
 
+HASH_BATCH_SIZE = 32 ## number of chunks handed to the worker pool at a time, bounds memory use
+
 def divide_file_to_chunks(path, chunk_size=CHUNK_SIZE):
     """
     This function aims at dividing a file into smaller chunks
@@ -17,15 +20,65 @@ def divide_file_to_chunks(path, chunk_size=CHUNK_SIZE):
     """
     if not os.path.exists(path):
         raise FileNotFoundError (f"File {path} does not exist") # Covering the edge case of no file found
-    
+
     chunk_number = 1 # initializing the chunks from 1
-    
+
+    buf = bytearray(chunk_size) # preallocated read buffer, reused for every chunk
+    mv = memoryview(buf) # memoryview lets us hash/slice the buffer without copying it
+
     with open(path, 'rb') as file:
-        while chunk := file.read(chunk_size): ## reading the file as chunks of the specified size
-            chunk_hash = hashlib.sha1(chunk).hexdigest() # computing sha1 hash for the current chunk
-            yield chunk, chunk_hash, chunk_number # returns the chunk data, chunk hash value and chunk no.
+        while True:
+            n = file.readinto(buf) ## reading directly into the reusable buffer, no fresh allocation per chunk
+            if not n:
+                break
+            if n == chunk_size:
+                chunk_hash = hashlib.sha1(buf).digest() # common full-chunk case, hash the buffer directly
+            else:
+                chunk_hash = hashlib.sha1(mv[:n]).digest() # last partial chunk, hash only the filled part
+            yield bytes(mv[:n]), chunk_hash, chunk_number # returns the chunk data, chunk hash value and chunk no.
             chunk_number += 1 # increasing the chunk sequence iteratively
 
+def _hash_chunk(chunk):
+    """
+    Hashes one chunk in a worker process. Kept at module level so the
+    process pool can pickle it.
+    """
+    return hashlib.sha1(chunk).digest()
+
+def divide_file_to_chunks_parallel(path, chunk_size=CHUNK_SIZE, max_workers=None):
+    """
+    Same contract as divide_file_to_chunks but spreads the SHA1 hashing
+    across CPU cores with a process pool. Chunk hashing is independent
+    per chunk, so on large files this scales close to linearly when
+    hashing is the bottleneck.
+    Chunks are read in batches of HASH_BATCH_SIZE so we never hold the
+    whole file in memory, and results are yielded in sequential order.
+    PARAMETERS:
+    path: Path of the file that we want to divide and share
+    chunk_size: Size of each chunk
+    max_workers: Number of worker processes (defaults to the CPU count)
+    yield: tuples of (chunk data, SHA1 hash, chunk number), same as divide_file_to_chunks
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File {path} does not exist") # Covering the edge case of no file found
+
+    chunk_number = 1 # initializing the chunks from 1
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        with open(path, 'rb') as file:
+            while True:
+                batch = [] ## reading a bounded batch of chunks for the pool to hash
+                while len(batch) < HASH_BATCH_SIZE:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    batch.append(chunk)
+                if not batch:
+                    break
+                for chunk, chunk_hash in zip(batch, pool.map(_hash_chunk, batch)): # map keeps results in submission order
+                    yield chunk, chunk_hash, chunk_number
+                    chunk_number += 1
+
 def write_chunk_to_file(chunk_data, chunk_number, output_dir = "chunks"):
     """
     This function is aimed at saving a chunk to a file in my specified directory
@@ -51,7 +104,7 @@ def print_chunk_data(path, chunk_number_to_display=1):
     """
     for chunk, chunk_hash, chunk_number in divide_file_to_chunks(path):
         if chunk_number == chunk_number_to_display:
-            print(f"Chunk {chunk_number} hash: {chunk_hash}")
+            print(f"Chunk {chunk_number} hash: {chunk_hash.hex()}")
             print(f"Chunk {chunk_number} data:\n{chunk.decode(errors='replace')[:100]}...")  # I am Printing the first 100 characters
             break
 
@@ -67,4 +120,4 @@ if __name__ == "__main__":
     output_directory = "/Users/prabhudattamishra/Desktop/P2P/chunks"  # Modify as needed
     for chunk, chunk_hash, chunk_number in divide_file_to_chunks(path):
         write_chunk_to_file(chunk, chunk_number, output_dir=output_directory)
-        print(f"Chunk {chunk_number} hash: {chunk_hash}")
+        print(f"Chunk {chunk_number} hash: {chunk_hash.hex()}")
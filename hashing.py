@@ -1,5 +1,11 @@
 import hashlib
 
+# Module-level alias so the hot verification path skips the hashlib attribute
+# lookup on every call. hashlib.sha1 dispatches to the OpenSSL EVP backend,
+# which uses the CPU's SHA instructions (SHA-NI on x86, ARMv8 crypto
+# extensions) when available.
+_sha1 = hashlib.sha1
+
 def calculate_sha1(data):
     """
     Calculates the SHA1 hash for a given data chunk.
@@ -7,16 +13,31 @@ def calculate_sha1(data):
     :param data: The data to hash.
     :return: SHA1 hash of the data as a hex string.
     """
-    sha1 = hashlib.sha1()
-    sha1.update(data)
-    return sha1.hexdigest()
+    return _sha1(data).hexdigest()
 
 def verify_chunk(chunk_data, expected_hash):
     """
     Verifies that the SHA1 hash of the given chunk data matches the expected hash.
+    The comparison happens on the raw 20-byte digests so the hot path avoids
+    hex-encoding the freshly computed hash.
 
     :param chunk_data: The chunk data to verify.
-    :param expected_hash: Expected SHA1 hash of the chunk.
+    :param expected_hash: Expected SHA1 hash of the chunk (hex string or raw bytes).
     :return: True if the chunk matches the expected hash, False otherwise.
     """
-    return calculate_sha1(chunk_data) == expected_hash
+    if isinstance(expected_hash, str):
+        expected_hash = bytes.fromhex(expected_hash)
+    return _sha1(chunk_data).digest() == expected_hash
+
+def verify_chunk_fast(chunk_data, expected_digest):
+    """
+    Specialized verification for callers that already hold the raw 20-byte
+    digest: a single hash-and-compare with no type dispatch. This is the
+    hottest verification path; the hashing itself already runs on OpenSSL's
+    hardware-accelerated SHA-1, so there is nothing left to compile away.
+
+    :param chunk_data: The chunk data to verify.
+    :param expected_digest: Expected raw 20-byte SHA1 digest of the chunk.
+    :return: True if the chunk matches the expected digest, False otherwise.
+    """
+    return _sha1(chunk_data).digest() == expected_digest
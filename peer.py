@@ -1,7 +1,12 @@
 import socket
 import threading
 import random
-from file_chunker import divide_file_to_chunks, CHUNK_SIZE
+import asyncio
+import errno
+import heapq
+import mmap
+from file_chunker import CHUNK_SIZE
+from bitfield import encode_bitfield, decode_bitfield
 from torrent_metadata import TorrentMetadata
 from time import sleep
 from piece_manager import PieceManager
@@ -9,14 +14,52 @@ import sys
 import argparse
 import requests
 import os
-import json
-from hashing import verify_chunk
+import logging
+import logging.handlers
+import queue
+import struct
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait as futures_wait, FIRST_COMPLETED
+from hashing import verify_chunk_fast
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
 TRACKER_HOST = '127.0.0.1'  # the host IP for the tracker server
 TRACKER_PORT = 9090  # the port on which the tracker server is listening
 MIN_PEERS_REQUIRED = 2  # minimum number of peers required to start downloading chunks
+ENDGAME_PIECES = 5  # when this few pieces remain, request each from every peer holding it
+MAX_PARALLEL_REQUESTS = 8  # upper bound on chunk requests kept in flight during the bulk download
+PEERS_UNCHANGED = 0xFFFFFFFF  # tracker reply sentinel: peer list unchanged since our last refresh
+
+# Per-chunk events go through this logger instead of print: at the default
+# INFO level each debug call reduces to a cheap level check, and when enabled
+# the records are formatted and written by a background QueueListener thread,
+# so the transfer threads never block on terminal I/O or the print lock.
+log = logging.getLogger('peer')
+log.setLevel(logging.INFO)
+_log_queue = queue.SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+# Chunk wire protocol: request is a fixed 4-byte uint32 chunk number, response
+# is a 1-byte status + 4-byte uint32 payload length, then the payload.
+STATUS_OK = 0
+STATUS_NOT_FOUND = 1
+
+SOCKET_BUFFER_SIZE = 2 * 1024 * 1024  # send/recv buffer size for chunk transfer sockets
+
+
+def tune_chunk_socket(sock):
+    """
+    Applies the socket options every chunk-transfer connection wants: Nagle
+    off (the framed request/response pattern stalls badly behind delayed
+    ACKs) and buffers sized well above the default so bursts of 64 KB chunks
+    keep the pipe full on links with some latency.
+    """
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
 
 class Peer:
     def __init__(self, peer_ip, file_to_share=None, torrent_metadata_path=None):
@@ -34,19 +77,45 @@ class Peer:
         self.tracker_peers = {}  # Store other peers and the chunks they have
         self.total_chunks = 0  # Total number of chunks in the file
         self.peer_port = None  # The port number on which the peer listens for requests
-        self.uploaded_chunks = {}  # Track how many chunks each peer has uploaded
+        self.uploaded_chunks = Counter()  # Track how many chunks each peer has uploaded
         self.top_peers = []  # List of the top 4 peers sorted by upload contribution
+        self._top_peers_set = set()  # Same peers as a set for O(1) membership tests
         self.optimistic_peer = None  # Randomly select a peer for optimistic unchoking
         self.piece_manager = None  # PieceManager instance
-        self.expected_hashes = None
+        self.peer_connections = {}  # Cached sockets per peer so each chunk doesn't pay a TCP handshake
+        self.tracker_socket = None  # Persistent connection to the tracker, reused across registrations
+        self.port_ready = threading.Event()  # Set once the listening socket is bound
+        self.share_file = None  # Open handle on the shared file when serving from an mmap
+        self.share_mmap = None  # mmap of the shared file; peer_chunks holds slices of it
+        self.download_fd = None  # Descriptor of the preallocated .part download file
+        self.download_part_path = None  # Path of the .part file renamed into place on finish
+        self.downloaded_bytes = 0  # Bytes landed in the download file so far
+        self.expected_hashes = []  # Raw piece digests when torrent metadata is loaded
+        self.tracker_seq = -1  # Last peer-list sequence number seen from the tracker
+        self.is_first_seeder = False  # True when no other peer held chunks at registration time
+        self.peers_ready = threading.Event()  # Set once the minimum peer threshold is reached
+        self.peers_lock = threading.Lock()  # Guards tracker_peers between refresh and download threads
+        self.tracker_failed = threading.Event()  # Set when the tracker becomes unreachable for good
+        self.chunk_size = CHUNK_SIZE  # Piece size; leechers take it from the torrent metadata
 
         if not file_to_share and torrent_metadata_path:
-            # Load expected hashes for leechers
-            with open(torrent_metadata_path, 'r') as f:
-                meta = json.load(f)
-                self.expected_hashes = meta['piece_hashes']
-                self.total_chunks = len(self.expected_hashes)
-                self.piece_manager = PieceManager(self.total_chunks)  # Ensure piece_manager is initialized for leechers
+            # Load expected hashes for leechers. Binary .torrent files carry
+            # the digests as raw bytes; legacy JSON files store one bulk hex
+            # string, and the oldest ones a list of per-piece hex strings.
+            meta = TorrentMetadata.load_metadata(torrent_metadata_path)
+            # The metadata defines the piece size the hashes were computed
+            # over; disk offsets and verification must use it, not our default
+            self.chunk_size = meta.get('chunk_size', CHUNK_SIZE)
+            piece_hashes = meta['piece_hashes']
+            if isinstance(piece_hashes, (bytes, bytearray)):
+                raw = bytes(piece_hashes)
+            elif isinstance(piece_hashes, list):
+                raw = b"".join(bytes.fromhex(h) for h in piece_hashes)
+            else:
+                raw = bytes.fromhex(piece_hashes)
+            self.expected_hashes = [raw[i:i + 20] for i in range(0, len(raw), 20)]
+            self.total_chunks = len(self.expected_hashes)
+            self.piece_manager = PieceManager(self.total_chunks)  # Ensure piece_manager is initialized for leechers
 
     def start(self):
         """
@@ -60,8 +129,7 @@ class Peer:
         listening_thread = threading.Thread(target=self.listen_for_requests)
         listening_thread.start()
 
-        while self.peer_port is None:
-            sleep(0.1)
+        self.port_ready.wait()  # Wakes as soon as the listening socket is bound
 
         if self.file_to_share:
             print(f"Sharing file: {self.file_to_share}")
@@ -69,10 +137,10 @@ class Peer:
 
         # Register with the tracker
         self.register_with_tracker()
+        # The refresh loop keeps the peer list fresh and feeds the readiness event
+        threading.Thread(target=self.refresh_top_peers_periodically).start()
         # Wait for the minimum number of peers
         self.wait_for_peers()
-        # Periodically refresh top peers
-        threading.Thread(target=self.refresh_top_peers_periodically).start()
         # Start downloading missing chunks
         self.download_chunks()
 
@@ -80,116 +148,173 @@ class Peer:
         """
         Prepares chunks for sharing. If this is the first seeder, share all chunks for maximum swarm efficiency.
         Otherwise, share a random subset (as before).
+        The subset is chosen by index up front and the file is streamed once,
+        so only the selected chunks are ever held in memory instead of
+        materializing the whole file as a list first.
         """
-        chunks = list(divide_file_to_chunks(self.file_to_share))
-        self.total_chunks = len(chunks)
+        file_size = os.path.getsize(self.file_to_share)
+        self.total_chunks = -(-file_size // self.chunk_size)  # ceiling division
         self.piece_manager = PieceManager(self.total_chunks)
+        self.ensure_torrent_metadata()
 
-        # Check if this is the only seeder (no other peers with chunks)
-        is_first_seeder = False
-        try:
-            tracker_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            tracker_socket.connect((TRACKER_HOST, TRACKER_PORT))
-            tracker_socket.send(b"REQUEST_PEERS")
-            peer_list = tracker_socket.recv(4096).decode().split("\n")
-            tracker_socket.close()
-            # If no other peer has any chunks, this is the first seeder
-            is_first_seeder = all((': ' not in p or p.endswith(': ')) for p in peer_list if p)
-        except Exception:
-            pass  # If tracker not available, fallback to random subset
-
-        if is_first_seeder:
+        # Check if this is the only seeder (no other peers with chunks). The
+        # check rides the normal framed registration over the persistent
+        # tracker connection instead of opening a dedicated socket and
+        # parsing an ASCII peer list.
+        self_addr = f"{self.peer_ip}:{self.peer_port}"
+        self.register_with_tracker()
+        self.is_first_seeder = not any(
+            chunks for addr, chunks in self.tracker_peers.items() if addr != self_addr)
+
+        # The file is mapped once and every shared chunk is a zero-copy
+        # memoryview slice of the mapping, served straight from the page
+        # cache instead of per-chunk bytes objects held on the heap.
+        self.share_file = open(self.file_to_share, 'rb')
+        self.share_mmap = mmap.mmap(self.share_file.fileno(), 0, access=mmap.ACCESS_READ)
+        file_view = memoryview(self.share_mmap)
+
+        if self.is_first_seeder:
             # Share all chunks for the first seeder
-            for chunk, chunk_hash, chunk_number in chunks:
-                self.peer_chunks[chunk_number] = chunk
-                print(f"[Seeder] Sharing ALL chunks: {chunk_number}")
+            selected_chunks = range(1, self.total_chunks + 1)
+            print(f"[Seeder] Sharing ALL {self.total_chunks} chunks from mapped file")
         else:
             # Share a random subset for subsequent seeders
             num_chunks_to_have = max(1, self.total_chunks // 2)
-            random_chunk_indices = random.sample(range(self.total_chunks), num_chunks_to_have)
-            for index in random_chunk_indices:
-                chunk, chunk_hash, chunk_number = chunks[index]
-                self.peer_chunks[chunk_number] = chunk
-                print(f"Prepared chunk {chunk_number} for sharing")
+            selected_chunks = sorted(random.sample(range(1, self.total_chunks + 1), num_chunks_to_have))
+            print(f"Prepared chunks {selected_chunks} for sharing")
 
-    def register_with_tracker(self):
+        for chunk_number in selected_chunks:
+            start = (chunk_number - 1) * self.chunk_size
+            self.peer_chunks[chunk_number] = file_view[start:min(start + self.chunk_size, file_size)]
+
+    def ensure_torrent_metadata(self):
+        """
+        Makes sure a .torrent metadata file with the piece hashes exists next
+        to the shared file. The whole-file hashing pass runs only once, the
+        first time a file is ever shared; warm restarts find the existing
+        metadata and skip straight to serving.
+        RETURNS:
+        Path to the .torrent metadata file.
+        """
+        torrent_path = os.path.splitext(self.file_to_share)[0] + ".torrent"
+        tracker_url = f"http://{TRACKER_HOST}:{TRACKER_PORT}/announce"
+        # save_metadata_to_file validates any existing .torrent (size, mtime
+        # and chunk_size must match the file we actually serve) and only
+        # rehashes when it is missing or stale, so a leftover metadata file
+        # built with a different piece size cannot poison downloads
+        metadata = TorrentMetadata(self.file_to_share, tracker_url, chunk_size=self.chunk_size)
+        metadata.save_metadata_to_file(torrent_path)
+        return torrent_path
+
+    def register_with_tracker(self, _retry=True):
         """
         Registers the peer and its available chunks with the tracker.
         Adds a user-friendly error if the tracker is not running.
         Also initializes piece_manager for leechers if needed.
+        Runs over the persistent tracker connection; if that connection has
+        gone stale (tracker restart, idle reset) the registration reconnects
+        and retries once before giving up.
         """
         try:
-            tracker_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            tracker_socket.connect((TRACKER_HOST, TRACKER_PORT))
-            available_chunks = " ".join(map(str, self.peer_chunks.keys()))
-            registration_msg = f"ADD_PEER {self.peer_ip}:{self.peer_port} {available_chunks}"
-            tracker_socket.send(registration_msg.encode())
-
-            response = tracker_socket.recv(1024).decode()
-            print(f"Tracker response: {response}")
-
-            tracker_socket.send("REQUEST_PEERS".encode())
-            peer_list = tracker_socket.recv(1024).decode().split("\n")
-            tracker_socket.close()
+            tracker_socket = self._get_tracker_connection()
+            self._drain_stale_tracker_data(tracker_socket)
+
+            # One round trip: register with a bitfield of our chunks and get
+            # the full peer list back in the framed binary reply. The request
+            # is length-prefixed so the tracker reassembles it even when a
+            # large bitfield spans several of its reads.
+            registration_msg = (b"ADD_PEER_AND_LIST " + f"{self.peer_ip}:{self.peer_port} {self.tracker_seq}".encode()
+                                + b"\0" + encode_bitfield(self.peer_chunks.keys()))
+            tracker_socket.sendall(struct.pack(">I", len(registration_msg)) + registration_msg)
+            peer_list = self._read_tracker_peer_list(tracker_socket)
+            if peer_list is None:
+                return  # Nothing changed since the last refresh; keep the current view
 
             # For leechers: determine total_chunks from peer list if not set
             if not self.file_to_share and self.total_chunks == 0:
-                max_chunk = 0
-                for peer_info in peer_list:
-                    if peer_info:
-                        try:
-                            _, chunks = peer_info.split(": ")
-                            chunk_nums = [int(x) for x in chunks.split(",") if x.strip()]
-                            if chunk_nums:
-                                max_chunk = max(max_chunk, max(chunk_nums))
-                        except Exception:
-                            continue
+                max_chunk = max((max(chunks) for chunks in peer_list.values() if chunks), default=0)
                 if max_chunk > 0:
                     self.total_chunks = max_chunk
                     self.piece_manager = PieceManager(self.total_chunks)
 
-            for peer_info in peer_list:
-                if peer_info:
-                    try:
-                        peer_addr, chunks = peer_info.split(": ")
-                        # Accept empty chunk lists for leechers
-                        if chunks.strip():
-                            chunk_list = list(map(int, chunks.split(",")))
-                        else:
-                            chunk_list = []
-                        self.tracker_peers[peer_addr] = chunk_list
-                        if self.piece_manager and chunk_list:
-                            self.piece_manager.update_available_pieces(chunk_list)
-                    except Exception:
-                        continue
+            # The refresh thread updates this dict for the lifetime of the
+            # peer, so mutations happen under the lock the download paths
+            # take when snapshotting it
+            with self.peers_lock:
+                for peer_addr, chunk_list in peer_list.items():
+                    self.tracker_peers[peer_addr] = chunk_list
+                    if self.piece_manager and chunk_list:
+                        self.piece_manager.update_available_pieces(chunk_list)
             print(f"Known peers and their chunks: {self.tracker_peers}")
+            if len(self.tracker_peers) >= MIN_PEERS_REQUIRED:
+                self.peers_ready.set()  # Unblocks wait_for_peers the moment the threshold is crossed
         except ConnectionRefusedError:
             print(f"[ERROR] Could not connect to tracker at {TRACKER_HOST}:{TRACKER_PORT}. Make sure the tracker server is running.")
-            sys.exit(1)
+            self._fail_tracker()
+        except (ConnectionError, TimeoutError) as e:
+            # The cached connection died underneath us; reconnect and retry once
+            self._drop_tracker_connection()
+            if _retry:
+                print(f"[WARN] Tracker connection lost ({e}), reconnecting...")
+                return self.register_with_tracker(_retry=False)
+            print(f"[ERROR] Could not re-establish tracker connection: {e}")
+            self._fail_tracker()
         except Exception as e:
             print(f"[ERROR] Unexpected error registering with tracker: {e}")
-            sys.exit(1)
+            self._fail_tracker()
+
+    def _fail_tracker(self):
+        """
+        Records that the tracker is gone for good. Registration also runs on
+        the background refresh thread, where sys.exit would only kill that
+        thread and leave the main thread blocked forever; instead the failure
+        flag is raised and peers_ready is set so wait_for_peers wakes up,
+        sees the flag and exits the process from the main thread.
+        """
+        self.tracker_failed.set()
+        self.peers_ready.set()
+
+    def iter_tracker_peers(self):
+        """
+        Returns a snapshot of the known peers and their chunks, taken under
+        the lock, so download loops can iterate it while the refresh thread
+        keeps inserting newly joined peers into the live dict.
+        RETURNS:
+        List of (peer address, chunk list) pairs.
+        """
+        with self.peers_lock:
+            return list(self.tracker_peers.items())
 
     def wait_for_peers(self):
         """
-        Waits until the minimum number of peers have connected before starting the downloads
+        Waits until the minimum number of peers have connected before starting the downloads.
+        Blocks on the readiness event with zero CPU; the periodic refresh loop
+        (and any tracker update) keeps registering until the threshold is met.
+        Exits if the tracker became unreachable before the threshold was hit.
         """
         print("Waiting for minimum peers to join...")
-        while len(self.tracker_peers) < MIN_PEERS_REQUIRED:
-            sleep(5)  # waiting for 5 seconds before checking again
-            self.register_with_tracker()  # Refresh the list of peers from the tracker
+        self.peers_ready.wait()  # Set by register_with_tracker when the threshold is crossed
+        if self.tracker_failed.is_set():
+            print("[ERROR] Tracker is unreachable, giving up.")
+            sys.exit(1)
         print("Minimum peer threshold has been reached, starting download process")
 
-    def save_chunk_to_disk(self, chunk_data, chunk_number, output_dir="received_chunks"):
+    def save_chunk_to_disk(self, chunk_data, chunk_number, output_file="reconstructed_download.txt"):
         """
-        Saves a received chunk to disk in the specified directory.
+        Writes a received chunk straight into its slot of the final download
+        file with a single positioned os.pwrite. The file is created and
+        preallocated once as output_file + ".part"; there are no per-chunk
+        temp files and no BufferedWriter layer, so every chunk costs one
+        write syscall and no second reconstruction pass copies the data.
         """
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        chunk_file_path = os.path.join(output_dir, f"chunk_{chunk_number}.chunk")
-        with open(chunk_file_path, 'wb') as chunk_file:
-            chunk_file.write(chunk_data)
-        print(f"Saved chunk {chunk_number} to {chunk_file_path}")
+        if self.download_fd is None:
+            self.download_part_path = output_file + ".part"
+            self.download_fd = os.open(self.download_part_path, os.O_RDWR | os.O_CREAT, 0o644)
+            if hasattr(os, 'posix_fallocate'):
+                # Reserve the blocks up front; trimmed to the real size on finish
+                os.posix_fallocate(self.download_fd, 0, self.total_chunks * self.chunk_size)
+        os.pwrite(self.download_fd, chunk_data, (chunk_number - 1) * self.chunk_size)
+        self.downloaded_bytes += len(chunk_data)
 
     @staticmethod
     def get_public_ip():
@@ -208,49 +333,145 @@ class Peer:
     def download_chunks(self):
         """
         Downloads missing chunks from other peers and saves them to disk.
+        The bulk of the download runs rarest-first with several requests in
+        flight at once across different peers, then switches to end-game mode
+        for the last few pieces so a single slow peer cannot stall the tail
+        of the download.
         """
-        while len(self.received_chunks) < self.total_chunks:
-            # Get the rarest piece first
-            rarest_piece = self.piece_manager.get_rarest_piece()
-
-            if rarest_piece:
-                # Try to download the rarest piece from the peers
-                for peer_addr in self.tracker_peers:
-                    if rarest_piece in self.tracker_peers[peer_addr]:
-                        success, received_chunk = self.request_chunk_from_peer(peer_addr, rarest_piece)
-                        if success:
-                            self.received_chunks.add(rarest_piece)
-                            self.piece_manager.mark_piece_complete(rarest_piece)
-                            self.save_chunk_to_disk(received_chunk, rarest_piece)
-                            print(f"Downloaded chunk {rarest_piece} from {peer_addr}")
-                            self.display_progress()
-                            break
-
-            # Check if all chunks have been downloaded
-            if len(self.received_chunks) == self.total_chunks:
-                print("Download complete! You are now a seeder")
-                self.reconstruct_file_from_chunks()
-                break
-            sleep(5)  # Wait before retrying
+        max_workers = min(MAX_PARALLEL_REQUESTS, max(1, len(self.tracker_peers)))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            in_flight = {}  # piece -> (future, serving peer)
+            while len(self.received_chunks) < self.total_chunks:
+                if self.piece_manager.missing_count <= ENDGAME_PIECES and not in_flight:
+                    progressed = self.download_endgame_pieces()
+                else:
+                    progressed = self.download_rarest_pieces_parallel(pool, in_flight, max_workers)
 
-    def reconstruct_file_from_chunks(self, output_file="reconstructed_download.txt", chunk_dir="received_chunks"):
+                # Check if all chunks have been downloaded
+                if len(self.received_chunks) == self.total_chunks:
+                    print("Download complete! You are now a seeder")
+                    self.reconstruct_file_from_chunks()
+                    break
+                if not progressed and not in_flight:
+                    sleep(5)  # Nothing downloadable right now, wait before retrying
+
+    def download_rarest_pieces_parallel(self, pool, in_flight, max_workers):
+        """
+        Keeps up to max_workers chunk requests in flight at once, rarest
+        pieces first, and settles whichever responses land first. Each peer
+        serves at most one outstanding request at a time because its cached
+        connection carries one request/response exchange in order; every
+        submission therefore happens in the top-up below, where the busy set
+        reflects all requests currently in flight. Completed chunks are
+        stored from this thread only, so no locking is needed around the
+        piece manager or the disk writes.
+        PARAMETERS:
+        pool: The ThreadPoolExecutor running request_chunk_from_peer calls.
+        in_flight: Mapping of piece -> (future, serving peer), carried across
+                   calls so the pipeline stays full.
+        max_workers: Maximum number of requests to keep in flight.
+        RETURNS:
+        True if at least one piece was downloaded.
+        """
+        # Top up the pipeline with the rarest missing pieces not yet in flight
+        free_slots = max_workers - len(in_flight)
+        if free_slots > 0:
+            busy_peers = {peer_addr for _, peer_addr in in_flight.values()}
+            candidates = heapq.nsmallest(
+                max_workers, self.piece_manager.missing_piece_numbers(),
+                key=lambda piece: self.piece_manager.piece_counts[piece - 1])
+            for piece in candidates:
+                if free_slots == 0:
+                    break
+                if piece in in_flight:
+                    continue
+                holders = [addr for addr, chunks in self.iter_tracker_peers()
+                           if piece in chunks and addr not in busy_peers]
+                if not holders:
+                    continue  # Every holder is already serving another request
+                peer_addr = holders[0]
+                future = pool.submit(self.request_chunk_from_peer, peer_addr, piece)
+                in_flight[piece] = (future, peer_addr)
+                busy_peers.add(peer_addr)
+                free_slots -= 1
+
+        if not in_flight:
+            return False
+
+        # Block until at least one response lands, then settle all finished ones
+        futures = {future: piece for piece, (future, _) in in_flight.items()}
+        done, _ = futures_wait(futures, return_when=FIRST_COMPLETED)
+        progressed = False
+        for future in done:
+            piece = futures[future]
+            _, peer_addr = in_flight.pop(piece)
+            success, received_chunk = future.result()
+            # A failed or hash-rejected chunk counts as no progress. It is NOT
+            # resubmitted here: a backup holder chosen at submission time may
+            # have become busy since, and two requests on one cached connection
+            # would interleave and desynchronize its length-prefixed stream.
+            # The piece simply stays missing and the next top-up pass picks a
+            # holder against the then-current busy set.
+            if success and self.store_received_chunk(piece, received_chunk, peer_addr):
+                progressed = True
+        return progressed
+
+    def download_endgame_pieces(self):
         """
-        Reconstructs the original file from all downloaded chunks in the correct order.
+        End-game mode: requests every remaining piece from ALL peers that hold
+        it, in parallel, and keeps whichever response lands first. The wire
+        protocol has no cancel message, so late duplicate responses are simply
+        discarded; with only a handful of pieces left the wasted bandwidth is
+        negligible next to avoiding a tail-latency stall.
+        Returns True if at least one piece was downloaded.
         """
-        if self.total_chunks == 0:
+        progressed = False
+        for piece in self.piece_manager.missing_piece_numbers():
+            holders = [addr for addr, chunks in self.iter_tracker_peers() if piece in chunks]
+            if not holders:
+                continue
+            with ThreadPoolExecutor(max_workers=len(holders)) as pool:
+                futures = {pool.submit(self.request_chunk_from_peer, addr, piece): addr for addr in holders}
+                for future in as_completed(futures):
+                    success, received_chunk = future.result()
+                    if (success and piece not in self.received_chunks
+                            and self.store_received_chunk(piece, received_chunk, futures[future])):
+                        progressed = True
+        return progressed
+
+    def store_received_chunk(self, chunk_number, chunk_data, peer_addr):
+        """
+        Records a downloaded chunk: verifies it against the piece hash when
+        one is known, marks it complete, writes it into place in the download
+        file and reports progress. Bad chunks are discarded so the piece
+        stays missing and gets requested again.
+        RETURNS:
+        True if the chunk was accepted, False if it failed verification.
+        """
+        if self.expected_hashes and not verify_chunk_fast(chunk_data, self.expected_hashes[chunk_number - 1]):
+            log.error("Chunk %d from %s failed hash verification, discarding.", chunk_number, peer_addr)
+            return False
+        self.received_chunks.add(chunk_number)
+        self.piece_manager.mark_piece_complete(chunk_number)
+        self.save_chunk_to_disk(chunk_data, chunk_number)
+        log.debug("Downloaded chunk %d from %s", chunk_number, peer_addr)
+        self.display_progress()
+        return True
+
+    def reconstruct_file_from_chunks(self, output_file="reconstructed_download.txt"):
+        """
+        Finalizes the download. Every chunk was already verified and written
+        into its final position on receipt, so finishing costs only a trim of
+        the preallocated file to its real size and an atomic rename of the
+        .part file — no second pass over the data.
+        """
+        if self.download_fd is None:
             print("[ERROR] No chunks to reconstruct.")
             return
-        chunk_files = []
-        for i in range(1, self.total_chunks + 1):
-            chunk_path = os.path.join(chunk_dir, f"chunk_{i}.chunk")
-            if not os.path.exists(chunk_path):
-                print(f"[ERROR] Missing chunk: {chunk_path}")
-                return
-            chunk_files.append(chunk_path)
-        with open(output_file, "wb") as out_f:
-            for chunk_path in chunk_files:
-                with open(chunk_path, "rb") as c_f:
-                    out_f.write(c_f.read())
+        os.ftruncate(self.download_fd, self.downloaded_bytes)  # drop the unused preallocated tail
+        os.close(self.download_fd)
+        self.download_fd = None
+        os.replace(self.download_part_path, output_file)
         print(f"Successfully reconstructed file as {output_file}")
 
     def display_progress(self):
@@ -258,99 +479,251 @@ class Peer:
         Displays the download progress as a percentage.
         """
         progress = (len(self.received_chunks) / self.total_chunks) * 100
-        print(f"File download progress: {progress:.2f}%")
+        log.debug("File download progress: %.2f%%", progress)
 
     def listen_for_requests(self):
         """
         Listening for incoming requests from other peers asking for chunks.
-        Now robust to port conflicts: if the port is in use, try the next one.
+        Runs a single asyncio event loop in this thread instead of spawning
+        one OS thread per connection, so the peer scales to large swarms with
+        O(1) threads. Still robust to port conflicts: if the port is in use,
+        try the next one.
+        """
+        asyncio.run(self.serve_chunk_requests())
+
+    async def serve_chunk_requests(self):
+        """
+        Binds the asyncio server (retrying on port conflicts) and serves chunk
+        requests until the peer shuts down.
         """
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         listen_port = getattr(self, 'listen_port', 8000)
         max_tries = 20
         tries = 0
+        server = None
         while tries < max_tries:
             try:
-                server_socket.bind(('0.0.0.0', listen_port))
+                server = await asyncio.start_server(self.handle_chunk_request, '0.0.0.0', listen_port)
                 break
             except OSError as e:
-                if e.errno == 10048:  # Address already in use
+                if e.errno in (errno.EADDRINUSE, 10048):  # Address already in use (10048 is the Windows code)
                     print(f"[WARN] Port {listen_port} in use, trying next port...")
                     listen_port += 1
                     tries += 1
-                    sleep(0.5)
+                    await asyncio.sleep(0.5)
                 else:
                     raise
-        else:
+        if server is None:
             print(f"[ERROR] Could not bind to any port after {max_tries} attempts.")
             sys.exit(1)
-        self.peer_port = server_socket.getsockname()[1]  # Store the assigned port
+        self.peer_port = server.sockets[0].getsockname()[1]  # Store the assigned port
+        self.port_ready.set()
         print(f"Listening for chunk requests on port {self.peer_port}...")
 
-        server_socket.listen(5)
-        while True:
-            conn, addr = server_socket.accept()
-            print(f"Connection from {addr}")
-            threading.Thread(target=self.handle_chunk_request, args=(conn,)).start()
+        async with server:
+            await server.serve_forever()
 
-    def handle_chunk_request(self, conn):
+    async def handle_chunk_request(self, reader, writer):
         """
-        Handles requests for chunks from other peers.
+        Handles requests for chunks from other peers. The connection is kept
+        open and served in a loop, so a downloading peer can request many
+        chunks over one socket instead of reconnecting per chunk. Each
+        response is length-prefixed (4-byte big-endian); a zero length means
+        the chunk is not available.
         """
+        peer_ip = writer.get_extra_info('peername')[0]
+        log.debug("Connection from %s", peer_ip)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            tune_chunk_socket(sock)  # Nagle off and big buffers on the upload side too
         try:
-            chunk_number = int(conn.recv(1024).decode())  # Reading the requested chunk number
-            if chunk_number in self.peer_chunks:
-                conn.send(self.peer_chunks[chunk_number])  # Sending the requested chunk
-                # Update the upload contribution for the requesting peer
-                peer_ip = conn.getpeername()[0]
-                self.uploaded_chunks[peer_ip] = self.uploaded_chunks.get(peer_ip, 0) + 1
-                print(f"Uploaded chunk {chunk_number} to {peer_ip}")
-            else:
-                conn.send(b"CHUNK_NOT_FOUND")  # Inform if the chunk is not available
+            while True:
+                try:
+                    request = await reader.readexactly(4)  # Fixed 4-byte request: the chunk number as a uint32
+                except asyncio.IncompleteReadError:
+                    break  # The peer closed the connection
+                (chunk_number,) = struct.unpack(">I", request)
+                if chunk_number in self.peer_chunks:
+                    chunk = self.peer_chunks[chunk_number]
+                    writer.write(struct.pack(">BI", STATUS_OK, len(chunk)))  # Header first, then the chunk itself
+                    if self.share_file is not None:
+                        # Zero-copy path: the chunk lives in the shared file, so
+                        # sendfile(2) moves it from page cache to the socket in
+                        # the kernel without surfacing the bytes in userspace
+                        await writer.drain()
+                        await asyncio.get_running_loop().sendfile(
+                            writer.transport, self.share_file,
+                            offset=(chunk_number - 1) * self.chunk_size, count=len(chunk), fallback=True)
+                    else:
+                        writer.write(chunk)  # Accepts bytes or a memoryview slice
+                        await writer.drain()
+                    # Update the upload contribution for the requesting peer
+                    self.uploaded_chunks[peer_ip] += 1
+                    log.debug("Uploaded chunk %d to %s", chunk_number, peer_ip)
+                else:
+                    writer.write(struct.pack(">BI", STATUS_NOT_FOUND, 0))  # Status byte informs that the chunk is not available
+                    await writer.drain()
         except Exception as e:
             print(f"Error handling chunk request: {e}")
         finally:
-            conn.close()
+            writer.close()
+
+    def _get_tracker_connection(self):
+        """
+        Returns the persistent tracker socket, connecting once on first use.
+        Registration refreshes reuse this connection instead of paying a TCP
+        handshake every few seconds; it also keeps the tracker's view of this
+        peer alive, since the tracker deregisters peers whose connection drops.
+        """
+        if self.tracker_socket is not None:
+            return self.tracker_socket
+        tracker_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        tracker_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        tracker_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        tracker_socket.connect((TRACKER_HOST, TRACKER_PORT))
+        self.tracker_socket = tracker_socket
+        return tracker_socket
+
+    def _drop_tracker_connection(self):
+        """
+        Closes and forgets the persistent tracker socket after an error so the
+        next registration reconnects cleanly.
+        """
+        if self.tracker_socket is not None:
+            try:
+                self.tracker_socket.close()
+            except OSError:
+                pass
+            self.tracker_socket = None
+
+    @staticmethod
+    def _drain_stale_tracker_data(tracker_socket):
+        """
+        Discards unsolicited tracker broadcasts sitting in the receive buffer
+        so the next read sees only the reply to the request we are about to
+        send. The tracker pushes peer-list updates to all registered
+        connections, and this peer only reads its socket around requests.
+        """
+        tracker_socket.setblocking(False)
+        try:
+            while True:
+                if not tracker_socket.recv(4096):
+                    raise ConnectionError("Tracker closed connection")
+        except BlockingIOError:
+            pass  # Buffer is empty, nothing stale left
+        finally:
+            tracker_socket.setblocking(True)
+
+    def _read_tracker_peer_list(self, tracker_socket):
+        """
+        Reads the framed binary peer list the tracker sends in reply to
+        ADD_PEER_AND_LIST: a uint32 update sequence and a uint32 peer count,
+        then per peer a uint16-length-prefixed address and a uint32-length-
+        prefixed chunk bitfield. A PEERS_UNCHANGED count means nothing changed
+        since the sequence we sent, so the reply carries no list at all.
+        RETURNS:
+        Dict mapping peer address to its list of chunk numbers, or None when
+        the list is unchanged since the last refresh.
+        """
+        (seq, peer_count) = struct.unpack(">II", self._recv_exact(tracker_socket, 8))
+        self.tracker_seq = seq
+        if peer_count == PEERS_UNCHANGED:
+            return None
+        peer_list = {}
+        for _ in range(peer_count):
+            (addr_len,) = struct.unpack(">H", self._recv_exact(tracker_socket, 2))
+            peer_addr = bytes(self._recv_exact(tracker_socket, addr_len)).decode()
+            (bitfield_len,) = struct.unpack(">I", self._recv_exact(tracker_socket, 4))
+            bitfield = self._recv_exact(tracker_socket, bitfield_len) if bitfield_len else b""
+            peer_list[peer_addr] = decode_bitfield(bitfield)
+        return peer_list
+
+    def _get_peer_connection(self, peer_addr):
+        """
+        Returns a cached socket to the given peer, connecting once on first
+        use. TCP_NODELAY avoids Nagle delays on the small request messages and
+        SO_KEEPALIVE reaps dead peers.
+        """
+        peer_socket = self.peer_connections.get(peer_addr)
+        if peer_socket is not None:
+            return peer_socket
+        peer_ip, peer_port = peer_addr.split(":")
+        peer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        tune_chunk_socket(peer_socket)
+        peer_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        peer_socket.connect((peer_ip, int(peer_port)))
+        self.peer_connections[peer_addr] = peer_socket
+        return peer_socket
+
+    def _drop_peer_connection(self, peer_addr):
+        """
+        Closes and forgets the cached socket for a peer after an error.
+        """
+        peer_socket = self.peer_connections.pop(peer_addr, None)
+        if peer_socket is not None:
+            try:
+                peer_socket.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _recv_exact(peer_socket, length):
+        """
+        Receives exactly `length` bytes from the socket, looping until the
+        full message has arrived (TCP recv returns *up to* N bytes, never a
+        guaranteed N). The data lands directly in one preallocated buffer via
+        recv_into, and that buffer is handed back as-is — verification and
+        disk writes accept it without a final bytes copy.
+        """
+        buf = bytearray(length)
+        view = memoryview(buf)
+        received = 0
+        while received < length:
+            n = peer_socket.recv_into(view[received:])
+            if not n:
+                raise ConnectionError("Peer closed connection mid-message")
+            received += n
+        return buf
 
     def request_chunk_from_peer(self, peer_addr, chunk_number):
         """
-        Requests a specific chunk from another peer.
+        Requests a specific chunk from another peer over a persistent
+        connection. Responses are length-prefixed, so the full chunk is read
+        back regardless of how TCP segments it.
         PARAMETERS:
         peer_addr: The address of the peer to request from.
         chunk_number: The number of the chunk to request.
         """
         try:
-            peer_ip, peer_port = peer_addr.split(":")
-            peer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            peer_socket.connect((peer_ip, int(peer_port)))
-            peer_socket.send(str(chunk_number).encode())  # Send the chunk request
-            
-            # Receive the chunk data
-            chunk_data = peer_socket.recv(CHUNK_SIZE)
-            peer_socket.close()
-
-            # Check if the chunk was not found
-            if chunk_data == b"CHUNK_NOT_FOUND":
+            peer_socket = self._get_peer_connection(peer_addr)
+            peer_socket.sendall(struct.pack(">I", chunk_number))  # Send the fixed 4-byte chunk request
+
+            # Read the 5-byte status + length header, then exactly `length` bytes
+            status, length = struct.unpack(">BI", self._recv_exact(peer_socket, 5))
+            if status != STATUS_OK:
                 print(f"Chunk {chunk_number} not found on peer {peer_addr}")
                 return False, f"Chunk {chunk_number} not found on peer {peer_addr}"
-            
+            chunk_data = self._recv_exact(peer_socket, length)
+
             # Return the successfully retrieved chunk data
             return True, chunk_data
 
         except Exception as e:
             print(f"Error requesting chunk {chunk_number} from {peer_addr}: {e}")
-            # Return False with the error message
+            # Drop the cached connection so the next attempt reconnects cleanly
+            self._drop_peer_connection(peer_addr)
             return False, f"Error requesting chunk {chunk_number} from {peer_addr}: {e}"
 
     def update_top_peers(self):
         """
         Updates the list of top 4 peers based on the number of chunks they've uploaded.
         """
-        sorted_peers = sorted(self.uploaded_chunks.items(), key=lambda item: item[1], reverse=True)
-        self.top_peers = [peer[0] for peer in sorted_peers[:4]]  # Top 4 peers by upload contribution
-        
+        # nlargest only tracks the 4 best entries instead of sorting every peer
+        best_peers = heapq.nlargest(4, self.uploaded_chunks.items(), key=lambda item: item[1])
+        self.top_peers = [peer[0] for peer in best_peers]  # Top 4 peers by upload contribution
+        self._top_peers_set = set(self.top_peers)  # For O(1) membership tests below
+
         # Select a random peer outside the top 4 for optimistic unchoking
-        non_top_peers = [peer for peer in self.tracker_peers if peer not in self.top_peers]
+        non_top_peers = [peer for peer in self.tracker_peers if peer not in self._top_peers_set]
         self.optimistic_peer = random.choice(non_top_peers) if non_top_peers else None
 
         print(f"Top 4 peers: {self.top_peers}")
@@ -358,13 +731,29 @@ class Peer:
 
     def refresh_top_peers_periodically(self, interval=30):
         """
-        Periodically refreshes the list of top peers every given interval.
+        Periodically refreshes the peer list from the tracker and the list of
+        top peers. One loop feeds both the unchoking logic and the readiness
+        event in wait_for_peers; it polls faster while the minimum peer
+        threshold has not been reached yet.
         PARAMETERS:
-        interval: Time in seconds between each refresh.
+        interval: Time in seconds between each refresh once peers are ready.
         """
-        while True:
+        while not self.tracker_failed.is_set():
+            self.register_with_tracker()  # Refresh the peer list (sets peers_ready at the threshold)
             self.update_top_peers()  # Update the top peers
-            sleep(interval)
+            sleep(interval if self.peers_ready.is_set() else 5)
+
+class GuiLogHandler(logging.Handler):
+    """
+    Forwards peer log records into the GUI's log queue, where the Tk main
+    loop drains them alongside the redirected print output.
+    """
+    def __init__(self, log_q):
+        super().__init__()
+        self.log_q = log_q
+
+    def emit(self, record):
+        self.log_q.put(self.format(record) + "\n")
 
 class PeerGUI:
     def __init__(self, master):
@@ -433,6 +822,12 @@ class PeerGUI:
         self.output_text = tk.Text(master, height=10, width=58, state=tk.DISABLED, bg="#f7f7f7")
         self.output_text.pack(pady=4)
 
+        # Log messages from the peer threads are queued here and drained on
+        # the Tk main loop; worker threads must never touch the Text widget
+        # directly since Tk is not thread-safe
+        self._log_q = queue.Queue()
+        master.after(50, self._drain_log)
+
         self.toggle_role()
 
     def toggle_role(self):
@@ -497,11 +892,16 @@ class PeerGUI:
             orig_print = builtins.print
             def gui_print(*args, **kwargs):
                 msg = ' '.join(str(a) for a in args)
-                self.append_output(msg + "\n")
+                self._log_q.put(msg + "\n")
                 orig_print(*args, **kwargs)
             builtins.print = gui_print
+            # Per-chunk events use the peer logger, not print; mirror them
+            # into the same queue so they show up if debug logging is enabled
+            gui_log_handler = GuiLogHandler(self._log_q)
+            log.addHandler(gui_log_handler)
             self.peer_instance.start()
             builtins.print = orig_print
+            log.removeHandler(gui_log_handler)
             self.status_var.set(f"{role.capitalize()} finished. (You are now a seeder!)" if role == "leecher" else f"Seeder running.")
         except Exception as e:
             self.append_output(f"[ERROR] {e}\n")
@@ -520,10 +920,26 @@ class PeerGUI:
         self.stop_button.config(state=tk.DISABLED)
 
     def append_output(self, msg):
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(tk.END, msg)
-        self.output_text.see(tk.END)
-        self.output_text.config(state=tk.DISABLED)
+        # Thread-safe: just enqueue; _drain_log inserts on the Tk main loop
+        self._log_q.put(msg)
+
+    def _drain_log(self):
+        # Drain everything queued since the last tick in one widget update,
+        # so a chatty peer costs one redraw per 50 ms instead of per print
+        try:
+            pending = self._log_q.get_nowait()
+            while True:
+                try:
+                    pending += self._log_q.get_nowait()
+                except queue.Empty:
+                    break
+            self.output_text.config(state=tk.NORMAL)
+            self.output_text.insert(tk.END, pending)
+            self.output_text.see(tk.END)
+            self.output_text.config(state=tk.DISABLED)
+        except queue.Empty:
+            pass
+        self.master.after(50, self._drain_log)
 
     def clear_output(self):
         self.output_text.config(state=tk.NORMAL)
@@ -1,49 +1,72 @@
-from collections import defaultdict
+from array import array
+import heapq
 import random
 
 class PieceManager:
     def __init__(self, total_pieces):
         """
         Initializes the PieceManager.
+        Piece state lives in two dense arrays indexed by piece id: an int
+        array of copy counts and a byte-per-piece missing bitmap. That keeps
+        the footprint at a few bytes per piece (instead of dict/set entries
+        with full PyObject overhead) and makes scans cache-friendly.
         PARAMETERS:
         total_pieces: Total number of pieces in the file.
         """
         self.total_pieces = total_pieces
-        self.available_pieces = defaultdict(int)  # Tracks the number of copies for each piece
-        self.missing_pieces = set(range(1, total_pieces + 1))  # Tracks missing pieces
+        self.piece_counts = array('i', bytes(4 * total_pieces))  # copies known per piece, zero-initialized
+        self.missing_bitmap = bytearray(b'\x01' * total_pieces)  # 1 = piece still missing
+        self.missing_count = total_pieces
+        self.rarity_heap = []  # (copies, piece) entries, kept lazily in sync with piece_counts
 
     def update_available_pieces(self, peer_chunks):
         """
         Updates the availability of pieces based on a peer's available chunks.
+        Each update pushes a fresh (copies, piece) entry onto the rarity heap;
+        entries with outdated counts are skipped lazily by get_rarest_piece.
+        Piece numbers outside the known range are ignored.
         PARAMETERS:
         peer_chunks: List of chunk numbers that a peer has.
         """
         for piece in peer_chunks:
-            self.available_pieces[piece] += 1
+            if 1 <= piece <= self.total_pieces:
+                self.piece_counts[piece - 1] += 1
+                heapq.heappush(self.rarity_heap, (self.piece_counts[piece - 1], piece))
 
     def get_rarest_piece(self):
         """
         Returns the rarest piece that is still missing.
+        Pops stale heap entries (completed pieces or outdated counts) until a
+        valid one surfaces, so selection costs O(log N) amortized instead of a
+        full scan of every known piece per call.
         RETURNS:
         The rarest piece number or None if all pieces are acquired.
         """
-        rarest_piece = None
-        min_count = float('inf')
+        while self.rarity_heap:
+            copies, piece = self.rarity_heap[0]
+            if not self.missing_bitmap[piece - 1] or copies != self.piece_counts[piece - 1]:
+                heapq.heappop(self.rarity_heap)  # stale entry, discard and keep looking
+                continue
+            return piece
+        return None
 
-        for piece, count in self.available_pieces.items():
-            if piece in self.missing_pieces and count < min_count:
-                min_count = count
-                rarest_piece = piece
-
-        return rarest_piece
+    def missing_piece_numbers(self):
+        """
+        Returns the numbers of all pieces that are still missing, in order.
+        RETURNS:
+        List of missing piece numbers.
+        """
+        return [index + 1 for index, missing in enumerate(self.missing_bitmap) if missing]
 
     def mark_piece_complete(self, piece_number):
         """
-        Marks a piece as complete and removes it from the missing set.
+        Marks a piece as complete and clears it from the missing bitmap.
         PARAMETERS:
         piece_number: The piece number that has been completed.
         """
-        self.missing_pieces.discard(piece_number)
+        if 1 <= piece_number <= self.total_pieces and self.missing_bitmap[piece_number - 1]:
+            self.missing_bitmap[piece_number - 1] = 0
+            self.missing_count -= 1
 
     def is_complete(self):
         """
@@ -51,4 +74,4 @@ class PieceManager:
         RETURNS:
         True if all pieces are complete, False otherwise.
         """
-        return len(self.missing_pieces) == 0
+        return self.missing_count == 0
@@ -0,0 +1,30 @@
+import unittest
+import hashlib
+from hashing import calculate_sha1, verify_chunk
+
+class TestHashing(unittest.TestCase):
+    def test_calculate_sha1_matches_hashlib(self):
+        """
+        The helper should produce the same hex digest as hashlib directly.
+        """
+        data = b'some chunk data'
+        self.assertEqual(calculate_sha1(data), hashlib.sha1(data).hexdigest())
+
+    def test_verify_chunk_hex_string(self):
+        """
+        Verification should accept the hex-string hashes stored in metadata.
+        """
+        data = b'another chunk'
+        self.assertTrue(verify_chunk(data, hashlib.sha1(data).hexdigest()))
+        self.assertFalse(verify_chunk(data, hashlib.sha1(b'tampered').hexdigest()))
+
+    def test_verify_chunk_raw_digest(self):
+        """
+        Verification should also accept raw 20-byte digests.
+        """
+        data = b'raw digest chunk'
+        self.assertTrue(verify_chunk(data, hashlib.sha1(data).digest()))
+        self.assertFalse(verify_chunk(data, hashlib.sha1(b'tampered').digest()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,110 +1,128 @@
 import unittest
-from unittest.mock import patch, MagicMock
+import hashlib
+import os
+import tempfile
+import threading
 from peer import Peer
+from piece_manager import PieceManager
 
 class TestPeer(unittest.TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start one serving peer for the whole class: binding the asyncio
+        server is the only expensive part of the fixture, so it is hoisted
+        here and every wire-protocol test talks to the same instance.
+        Tests run inside a temporary directory so download files written by
+        store_received_chunk never touch the repository.
+        """
+        cls._old_cwd = os.getcwd()
+        cls._tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(cls._tmp_dir.name)
+
+        cls.chunk_data = b'test_chunk_data'
+        cls.server = Peer('127.0.0.1')
+        cls.server.peer_chunks = {1: cls.chunk_data}
+        cls.server.listen_port = 18200  # Keep clear of the default 8000 range
+        threading.Thread(target=cls.server.listen_for_requests, daemon=True).start()
+        assert cls.server.port_ready.wait(10), "serving peer never bound a port"
+        cls.server_addr = f"127.0.0.1:{cls.server.peer_port}"
+        cls.requester = Peer('127.0.0.1')
+
+    @classmethod
+    def tearDownClass(cls):
         """
-        Create a Peer instance before every test.
+        Close the cached request connection and restore the working
+        directory; the serving thread is a daemon and dies with the process.
         """
-        self.peer = Peer()
+        cls.requester._drop_peer_connection(cls.server_addr)
+        os.chdir(cls._old_cwd)
+        cls._tmp_dir.cleanup()
 
-    @patch('peer.socket.socket')
-    def test_listen_for_requests(self, mock_socket):
+    def test_request_chunk_round_trip(self):
         """
-        Test if the peer starts listening on a dynamically assigned port.
+        Test requesting an available chunk over the framed wire protocol.
         """
-        mock_socket_inst = MagicMock()
-        mock_socket.return_value = mock_socket_inst
+        success, chunk = self.requester.request_chunk_from_peer(self.server_addr, 1)
+        self.assertTrue(success)
+        self.assertEqual(bytes(chunk), self.chunk_data)
+        # The upload must be credited to the requesting peer's IP
+        self.assertGreaterEqual(self.server.uploaded_chunks['127.0.0.1'], 1)
 
-        self.peer.listen_for_requests()
-        mock_socket_inst.bind.assert_called()  # Ensure the socket is bound to a port
-        mock_socket_inst.listen.assert_called_with(5)
-
-    @patch('peer.socket.socket')
-    def test_request_chunk(self, mock_socket):
+    def test_request_chunk_not_found(self):
         """
-        Test requesting a chunk from a peer.
+        Test behavior when requesting a chunk the peer does not have.
         """
-        mock_socket_inst = MagicMock()
-        mock_socket.return_value = mock_socket_inst
-        mock_socket_inst.recv.return_value = b'test_chunk_data'  # Mock received chunk data
-
-        chunk = self.peer.request_chunk("127.0.0.1", 1, 9090)
-        self.assertEqual(chunk, b'test_chunk_data')  # Ensure the correct chunk data is returned
-        mock_socket_inst.connect.assert_called_with(("127.0.0.1", 9090))
-        mock_socket_inst.send.assert_called_with(b'1')
+        success, _ = self.requester.request_chunk_from_peer(self.server_addr, 99)
+        self.assertFalse(success)
 
-    @patch('peer.socket.socket')
-    def test_request_chunk_not_found(self, mock_socket):
+    def test_requests_share_one_connection(self):
         """
-        Test behavior when requesting a chunk that is not found on the peer.
+        Test that repeated requests reuse the cached peer connection.
         """
-        mock_socket_inst = MagicMock()
-        mock_socket.return_value = mock_socket_inst
-        mock_socket_inst.recv.return_value = b'CHUNK_NOT_FOUND'
+        self.requester.request_chunk_from_peer(self.server_addr, 1)
+        first_socket = self.requester.peer_connections[self.server_addr]
+        self.requester.request_chunk_from_peer(self.server_addr, 1)
+        self.assertIs(self.requester.peer_connections[self.server_addr], first_socket)
 
-        chunk = self.peer.request_chunk("127.0.0.1", 1, 9090)
-        self.assertIsNone(chunk)  # Ensure None is returned for missing chunk
-        mock_socket_inst.connect.assert_called_with(("127.0.0.1", 9090))
+    def test_store_received_chunk_accepts_valid_chunk(self):
+        """
+        Test that a chunk matching its piece hash is recorded and written.
+        """
+        peer = Peer('127.0.0.1')
+        peer.total_chunks = 1
+        peer.piece_manager = PieceManager(1)
+        peer.expected_hashes = [hashlib.sha1(self.chunk_data).digest()]
+        self.assertTrue(peer.store_received_chunk(1, self.chunk_data, self.server_addr))
+        self.assertIn(1, peer.received_chunks)
+        self.assertTrue(peer.piece_manager.is_complete())
+        peer.reconstruct_file_from_chunks(output_file="accepted_chunk.bin")
+        with open("accepted_chunk.bin", 'rb') as reconstructed:
+            self.assertEqual(reconstructed.read(), self.chunk_data)
 
-    @patch('peer.socket.socket')
-    def test_connect_to_tracker(self, mock_socket):
+    def test_store_received_chunk_rejects_bad_chunk(self):
         """
-        Test connecting to the tracker and retrieving the list of peers.
+        Test that a chunk failing hash verification is discarded as no progress.
         """
-        mock_socket_inst = MagicMock()
-        mock_socket.return_value = mock_socket_inst
-        mock_socket_inst.recv.side_effect = [
-            b'PEER_ADDED',  # First call simulates peer registration
-            b'127.0.0.1:9090\n127.0.0.2:9091'  # Second call simulates peers list
-        ]
-
-        peers = self.peer.connect_to_tracker()
-        self.assertEqual(peers, ['127.0.0.1:9090', '127.0.0.2:9091'])  # Check if peer list matches
-
-    @patch('peer.socket.socket')
-    def test_add_chunk_and_handle_request(self, mock_socket):
-        """
-        Test if the peer can correctly handle chunk requests.
-        """
-        # Prepare a chunk to be served
-        self.peer.peer_chunks = {1: b'test_chunk_data'}
-        
-        client_socket = MagicMock()
-        client_socket.recv.return_value = b'1'
-        
-        self.peer.handle_chunk_request(client_socket)
-        client_socket.send.assert_called_with(b'test_chunk_data')  # Ensure correct chunk is sent
-    
-    @patch('peer.socket.socket')
-    def test_handle_missing_chunk_request(self, mock_socket):
-        """
-        Test behavior when a peer requests a chunk that is not available.
-        """
-        client_socket = MagicMock()
-        client_socket.recv.return_value = b'99'  # Request a non-existent chunk
-        
-        self.peer.handle_chunk_request(client_socket)
-        client_socket.send.assert_called_with(b'CHUNK_NOT_FOUND')  # Ensure 'CHUNK_NOT_FOUND' is sent
+        peer = Peer('127.0.0.1')
+        peer.total_chunks = 1
+        peer.piece_manager = PieceManager(1)
+        peer.expected_hashes = [hashlib.sha1(self.chunk_data).digest()]
+        self.assertFalse(peer.store_received_chunk(1, b'corrupted_data', self.server_addr))
+        self.assertNotIn(1, peer.received_chunks)
+        self.assertEqual(peer.piece_manager.missing_count, 1)
 
     def test_update_top_peers(self):
         """
         Test updating the top 4 peers based on upload contribution.
         """
-        # Simulate uploaded chunks for several peers
-        self.peer.uploaded_chunks = {
+        peer = Peer('127.0.0.1')
+        peer.uploaded_chunks.update({
             "127.0.0.1": 5,
             "127.0.0.2": 3,
             "127.0.0.3": 8,
             "127.0.0.4": 2,
             "127.0.0.5": 10
-        }
-        self.peer.peers = ["127.0.0.1", "127.0.0.2", "127.0.0.3", "127.0.0.4", "127.0.0.5"]
+        })
+        peer.tracker_peers = {f"127.0.0.{i}": [] for i in range(1, 6)}
+
+        peer.update_top_peers()
+        self.assertEqual(peer.top_peers, ["127.0.0.5", "127.0.0.3", "127.0.0.1", "127.0.0.2"])
+        self.assertEqual(peer.optimistic_peer, "127.0.0.4")  # Only non-top peer left
 
-        self.peer.update_top_peers()
-        self.assertEqual(self.peer.top_peers, ["127.0.0.5", "127.0.0.3", "127.0.0.1", "127.0.0.2"])
-        self.assertIn(self.peer.optimistic_peer, ["127.0.0.4"])  # Non-top peers
+    def test_leecher_loads_metadata(self):
+        """
+        Test that a leecher picks up piece hashes and chunk size from a .torrent.
+        """
+        from torrent_metadata import TorrentMetadata
+        with open("shared.bin", 'wb') as shared:
+            shared.write(os.urandom(1024))
+        metadata = TorrentMetadata("shared.bin", "http://127.0.0.1:9090/announce", chunk_size=512)
+        metadata.save_metadata_to_file("shared.torrent")
+        leecher = Peer('127.0.0.1', None, "shared.torrent")
+        self.assertEqual(leecher.total_chunks, 2)
+        self.assertEqual(leecher.chunk_size, 512)
+        self.assertEqual(len(leecher.expected_hashes[0]), 20)
 
 if __name__ == '__main__':
     unittest.main()
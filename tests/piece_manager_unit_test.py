@@ -0,0 +1,41 @@
+import unittest
+from piece_manager import PieceManager
+
+class TestPieceManager(unittest.TestCase):
+    def test_rarest_piece_selection(self):
+        """
+        The piece with the fewest copies across peers should be picked first.
+        """
+        pm = PieceManager(3)
+        pm.update_available_pieces([1, 2, 3])
+        pm.update_available_pieces([1, 2])
+        pm.update_available_pieces([1])
+        self.assertEqual(pm.get_rarest_piece(), 3)
+
+    def test_completed_pieces_are_skipped(self):
+        """
+        Marking a piece complete should move selection on to the next rarest.
+        """
+        pm = PieceManager(2)
+        pm.update_available_pieces([1, 2])
+        pm.update_available_pieces([2])
+        self.assertEqual(pm.get_rarest_piece(), 1)
+        pm.mark_piece_complete(1)
+        self.assertEqual(pm.get_rarest_piece(), 2)
+        pm.mark_piece_complete(2)
+        self.assertIsNone(pm.get_rarest_piece())
+        self.assertTrue(pm.is_complete())
+
+    def test_rarity_updates_between_selections(self):
+        """
+        New availability announcements should change which piece is rarest.
+        """
+        pm = PieceManager(2)
+        pm.update_available_pieces([1])
+        self.assertEqual(pm.get_rarest_piece(), 1)
+        pm.update_available_pieces([1, 2])
+        pm.update_available_pieces([1])
+        self.assertEqual(pm.get_rarest_piece(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,40 @@
 import os
 import json
+import struct
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Files at least this large are hashed by a process pool; smaller ones are not
+# worth the worker startup cost
+PARALLEL_HASH_THRESHOLD = 32 * 1024 * 1024
+
+# Magic prefix of the binary .torrent container: a small JSON header with the
+# file facts followed by the raw 20-byte piece digests as one blob, so loading
+# never parses or hex-decodes per-piece strings
+TORRENT_MAGIC = b"P2PT\x01"
+
+def _hash_piece(piece):
+    """
+    Hashes one (path, offset, length) piece of a file. Module-level so it can
+    be pickled for worker processes; each worker reads its piece with os.pread
+    so only the raw 20-byte digests travel back between processes.
+    """
+    path, offset, length = piece
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return hashlib.sha1(os.pread(fd, length, offset)).digest()
+    finally:
+        os.close(fd)
 
 class TorrentMetadata:
     def __init__(self, file_path, tracker_url, chunk_size=256 * 1024):
         self.file_path = file_path
         self.tracker_url = tracker_url
         self.chunk_size = chunk_size
-        self.piece_hashes = []  # Stores SHA1 hashes of each chunk
+        self.piece_hashes = bytearray()  # Raw 20-byte SHA1 digests of all chunks, concatenated
         self.total_size = None
+        self._metadata_cache = None  # Memoized metadata dict
+        self._metadata_cache_key = None  # (mtime, size) of the file it was built from
 
     def generate_metadata(self):
         """
@@ -17,48 +43,121 @@ class TorrentMetadata:
         """
         if not os.path.exists(self.file_path):
             raise FileNotFoundError(f"File {self.file_path} does not exist.")
-        
+
+        # Re-hashing is skipped entirely while the source file is unchanged
+        # (same mtime and size); repeat calls return the memoized dict
+        cache_key = (os.path.getmtime(self.file_path), os.path.getsize(self.file_path))
+        if self._metadata_cache is not None and self._metadata_cache_key == cache_key:
+            return self._metadata_cache
+
         # Calculate the total file size
         self.total_size = os.path.getsize(self.file_path)
+        # Digests are kept raw (20 bytes each) in one preallocated buffer and
+        # hex-encoded in a single pass at serialization time, instead of
+        # building a 40-char str per piece as it is hashed
+        num_pieces = -(-self.total_size // self.chunk_size) if self.total_size else 0
+        self.piece_hashes = bytearray(20 * num_pieces)
         
-        # Calculate hashes for each chunk and add to piece_hashes
-        with open(self.file_path, 'rb') as file:
-            while chunk := file.read(self.chunk_size):
-                chunk_hash = hashlib.sha1(chunk).hexdigest()
-                self.piece_hashes.append(chunk_hash)
-        
+        # Calculate hashes for each chunk and add to piece_hashes. Piece
+        # hashing has no cross-piece dependency, so large files are split
+        # into (offset, length) pieces and hashed across worker processes;
+        # executor.map preserves piece order. Small files stay on the serial
+        # readinto path where the pool startup would dominate.
+        workers = os.cpu_count() or 1
+        if self.total_size >= PARALLEL_HASH_THRESHOLD and workers > 1:
+            pieces = [(self.file_path, offset, min(self.chunk_size, self.total_size - offset))
+                      for offset in range(0, self.total_size, self.chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for index, digest in enumerate(pool.map(
+                        _hash_piece, pieces, chunksize=max(1, len(pieces) // (4 * workers)))):
+                    self.piece_hashes[index * 20:(index + 1) * 20] = digest
+        else:
+            # The file is read into one preallocated buffer with readinto, so
+            # no per-chunk bytes object is created and the hasher always sees
+            # a contiguous buffer (hashlib.sha1 runs on OpenSSL's
+            # hardware-accelerated SHA-1)
+            with open(self.file_path, 'rb') as file:
+                buffer = bytearray(self.chunk_size)
+                view = memoryview(buffer)
+                index = 0
+                while (read := file.readinto(buffer)):
+                    self.piece_hashes[index * 20:(index + 1) * 20] = hashlib.sha1(
+                        view if read == self.chunk_size else view[:read]).digest()
+                    index += 1
+
         metadata = {
             "file_name": os.path.basename(self.file_path),
             "tracker_url": self.tracker_url,
             "chunk_size": self.chunk_size,
             "total_size": self.total_size,
-            "piece_hashes": self.piece_hashes
+            "source_mtime": cache_key[0],
+            # One bulk hexlify of all digests instead of one hexdigest per piece
+            "piece_hashes": self.piece_hashes.hex()
         }
-        
+        self._metadata_cache = metadata
+        self._metadata_cache_key = cache_key
+
         return metadata
 
-    def save_metadata_to_file(self, output_path):
+    def save_metadata_to_file(self, output_path, force=False):
         """
-        Saves the generated metadata to a JSON file, which acts as the .torrent file.
-        
+        Saves the generated metadata as a binary .torrent file: the magic
+        prefix, a length-prefixed JSON header, then the raw piece digests.
+        When the .torrent already matches the source file (same size and
+        recorded mtime), the hashes are loaded from it instead of re-reading
+        and re-hashing the whole file; pass force=True to regenerate anyway.
+
         :param output_path: Path where the metadata file will be saved.
+        :param force: Regenerate the metadata even if the existing file matches.
         """
+        if not force and os.path.exists(output_path):
+            try:
+                cached = self.load_metadata(output_path)
+                if (cached.get("total_size") == os.path.getsize(self.file_path)
+                        and cached.get("source_mtime") == os.path.getmtime(self.file_path)
+                        and cached.get("chunk_size") == self.chunk_size):
+                    hashes = cached["piece_hashes"]
+                    # Binary .torrent files carry the digests raw; JSON ones
+                    # carry them as one bulk hex string
+                    self.piece_hashes = (bytearray(hashes)
+                                         if isinstance(hashes, (bytes, bytearray))
+                                         else bytearray.fromhex(hashes))
+                    self.total_size = cached["total_size"]
+                    print(f"Metadata at {output_path} is up to date, skipping rehash")
+                    return
+            except (ValueError, TypeError, KeyError, OSError):
+                pass  # Unreadable or old-format metadata file: regenerate it below
         metadata = self.generate_metadata()
-        with open(output_path, 'w') as metafile:
-            json.dump(metadata, metafile, indent=4)
+        # The digests go into the file as-is; only the small header is JSON,
+        # so neither saving nor loading ever hex-encodes per piece
+        header = {key: value for key, value in metadata.items() if key != "piece_hashes"}
+        header_bytes = json.dumps(header).encode()
+        with open(output_path, 'wb') as metafile:
+            metafile.write(TORRENT_MAGIC)
+            metafile.write(struct.pack(">I", len(header_bytes)))
+            metafile.write(header_bytes)
+            metafile.write(self.piece_hashes)
         print(f"Metadata saved to {output_path}")
 
     @staticmethod
     def load_metadata(file_path):
         """
-        Loads metadata from a JSON file.
-        
-        :param file_path: Path to the .torrent JSON file.
+        Loads metadata from a .torrent file. Binary files (magic-prefixed)
+        return piece_hashes as the raw digest bytes with no per-piece parsing;
+        legacy JSON files are still accepted and keep their hex encoding.
+
+        :param file_path: Path to the .torrent file.
         :return: Metadata dictionary
         """
-        with open(file_path, 'r') as metafile:
-            metadata = json.load(metafile)
-        return metadata
+        with open(file_path, 'rb') as metafile:
+            blob = metafile.read()
+        if blob.startswith(TORRENT_MAGIC):
+            header_start = len(TORRENT_MAGIC) + 4
+            (header_length,) = struct.unpack_from(">I", blob, len(TORRENT_MAGIC))
+            metadata = json.loads(blob[header_start:header_start + header_length])
+            metadata["piece_hashes"] = blob[header_start + header_length:]
+            return metadata
+        return json.loads(blob.decode())
 
 # Example usage
 if __name__ == "__main__":
@@ -1,5 +1,26 @@
-import socket 
-import threading 
+import socket
+import selectors
+import select
+import struct
+import logging
+import logging.handlers
+import queue
+from time import monotonic
+from bitfield import encode_bitfield, decode_bitfield
+
+PEERS_UNCHANGED = 0xFFFFFFFF  # count sentinel: peer list unchanged since the client's sequence
+
+# Per-request chatter goes through this logger instead of print: the event
+# loop serves every connection on one thread, so a print of a large peer list
+# would stall all of them. At the default INFO level each debug call is a
+# cheap level check, and enabled records are written by a background
+# QueueListener thread rather than the loop itself.
+log = logging.getLogger('tracker')
+log.setLevel(logging.INFO)
+_log_queue = queue.SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
 
 class Tracker:
     def __init__(self, host="0.0.0.0", port=9090):
@@ -13,74 +34,224 @@ class Tracker:
         self.host = host
         self.port = port
         self.peers = {} ## this is a dictionary to store peer addresses and the chunks they have
-        self.peer_connections = {} ## Keep trackn of peer connections for broadcasting
+        self.peer_bitfields = {} ## per-peer encoded chunk bitfields, reused in framed replies
+        ## Broadcast subscribers live in a compact slab: a dense list of
+        ## (peer, socket) slots that broadcast walks straight through, with
+        ## vacated indices recycled instead of dict churn per join/leave
+        self._conn_slots = [] ## slab of (peer_ip, socket) entries; None marks a free slot
+        self._free_slots = [] ## indices of vacated slots, reused before growing the slab
+        self._conn_index = {} ## peer ip -> slot index, for O(1) unsubscribe
+        self.update_seq = 0 ## Bumped whenever the peer set or any peer's chunks change
+        self.selector = None ## Event loop selector driving all peer connections
+        self._peer_list_cache = None ## Encoded ASCII peer list, rebuilt only when update_seq moves
+        self._peer_list_cache_seq = -1 ## update_seq the cache was built at
+        self._recv_buffers = {} ## per-connection accumulation buffers for framed requests
+        ## One reusable receive buffer shared by every connection; the selector
+        ## loop is single-threaded, so each recv_into lands here and is copied
+        ## straight into the connection's accumulation buffer without ever
+        ## allocating a fresh bytes object per recv. 64 KB also lets one
+        ## syscall drain several pipelined requests at once.
+        self._recv_scratch = memoryview(bytearray(65536))
 
     def start(self):
         """
         Starting the tracker server to manage the peers for a connection.
-        The server is binding to the specified host and port and keeps on listening on that port
-        for peer connections, all peer connections are handled in a separate thread.
+        The server is binding to the specified host and port and drives all
+        peer connections from one selector event loop (epoll on Linux):
+        instead of dedicating a thread and its stack to every connected peer,
+        idle connections cost only their selector registration and readable
+        sockets are serviced one request at a time. The request handlers are
+        short in-memory dictionary operations, so dispatching them inline on
+        the loop avoids both thread hand-off latency and locking around the
+        peer tables.
         """
         try:
             ## creating a socket for the tracker server
             tracker_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            ## Rebind instantly after a restart, and let the kernel balance
+            ## connections across processes if more trackers share the port
+            tracker_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                tracker_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             tracker_socket.bind((self.host, self.port)) ## binding the socket to the specified host and port
-            tracker_socket.listen(5) ## listening for incoming connections, with a maximum backlog of 5
+            tracker_socket.listen(1024) ## deep backlog so connection bursts queue instead of being refused
+            tracker_socket.setblocking(False)
+            self.selector = selectors.DefaultSelector()
+            ## data=None marks the listening socket; client sockets carry their address
+            self.selector.register(tracker_socket, selectors.EVENT_READ, None)
             print(f"Tracker started on {self.host}:{self.port}, waiting for peers....")
 
             while True:
-                client_socket, addr = tracker_socket.accept()
-                print(f"Peer {addr} connected.")
-                ## here i will start a new thread to handle the peer connection.
-                threading.Thread(target=self.handle_peer, args =(client_socket, addr)).start()
+                for key, _ in self.selector.select():
+                    if key.data is None:
+                        self.accept_peer(key.fileobj)
+                    else:
+                        self.service_peer(key.fileobj, key.data)
         except Exception as e:
             print(f"Error in tracker operation: {e}")
         finally:
              # Ensuring the tracker socket is closed if an error occurs.
             tracker_socket.close()
 
-    def handle_peer(self, client_socket, addr):
+    def accept_peer(self, tracker_socket):
+        """
+        Accepts a new peer connection and registers it with the selector.
+        PARAMETERS:
+        tracker_socket: The listening socket that became readable.
+        """
+        client_socket, addr = tracker_socket.accept()
+        log.debug("Peer %s connected.", addr)
+        client_socket.setblocking(False)
+        ## Replies are small control messages; Nagle would hold them back up
+        ## to 40 ms waiting for more data, and keepalive reaps dead peers
+        ## without the tracker having to poll them
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.selector.register(client_socket, selectors.EVENT_READ, addr)
+
+    def service_peer(self, client_socket, addr):
         """
         This is one of the crucial function of our system.
-        Manages communication with the peer.
-        This method handles a request from a peer, such as requesting the peer list,
-        adding or removing a peer and broadcasting updates to all peers.
-        It keeps on listening to the peer connection until it is closed
+        Manages communication with the peer: runs one receive cycle for a
+        readable peer socket. Current peers send 4-byte length-prefixed
+        frames, accumulated in a per-connection buffer until complete, so
+        requests larger than one recv are reassembled and pipelined requests
+        are split apart instead of being string-matched as one blob. Bare
+        legacy ASCII commands (whose first byte is a printable letter, which
+        a frame length never produces) are dispatched as-is.
         PARAMETERS:
         client_socket: This socket is used for communicating with the connected peer.
         addr: Address of the connected peer(It's host and port)
         """
         try:
-            while True:
-                data= client_socket.recv(1024).decode()
-                ## If not receiving any data , breaking the loop to exit the connection
-                if not data:
+            received = client_socket.recv_into(self._recv_scratch)
+            ## If not receiving any data, the peer closed its end of the connection
+            if not received:
+                self.disconnect_peer(client_socket, addr)
+                return
+
+            buffer = self._recv_buffers.setdefault(client_socket, bytearray())
+            buffer += self._recv_scratch[:received]
+            while buffer:
+                if buffer.startswith((b"REQUEST_PEERS", b"ADD_PEER", b"REMOVE_PEER")):
+                    ## Unframed legacy command: one command per datagram-style send
+                    request = bytes(buffer)
+                    buffer.clear()
+                    self.dispatch_request(client_socket, addr, request)
                     break
+                if len(buffer) < 4:
+                    break  # The length prefix itself is still incomplete
+                (frame_length,) = struct.unpack_from(">I", buffer)
+                if len(buffer) < 4 + frame_length:
+                    break  # Wait for the rest of the frame to arrive
+                request = bytes(buffer[4:4 + frame_length])
+                del buffer[:4 + frame_length]
+                self.dispatch_request(client_socket, addr, request)
 
-                ## Handling different types of requests from the peer
-                if data == "REQUEST_PEERS":
-                    ## sending the list, if the peer requests the list of other peers
-                    self.send_peers_list(client_socket, addr)
-                elif data.startswith("ADD_PEER"):
-                    ## if the peer wants to be added to the tracker, we update the list and broadcast to others
-                    self.add_peer(client_socket, data)
-                    self.broadcast_peer_list()
-                elif data.startswith("REMOVE_PEER"):
-                    ## if the peers is removing itself, we update the list and broadcast to the others
-                    self.remove_peer(client_socket, addr)
-                    self.broadcast_peer_list()
-                else:
-                    # Handle any unrecognized requests.
-                    print(f"Unknown request from {addr}: {data}")
-        
+        except ConnectionError:
+            self.disconnect_peer(client_socket, addr)
         except Exception as e:
             print(f"Error handling peer {addr}: {e}")
-        
-        finally:
-            # Close the socket connection with the peer.
-            client_socket.close()
-            # Removing the peer from the tracker, for ensuring it's no longer in the list.
-            self.remove_peer(None, addr)
+            self.disconnect_peer(client_socket, addr)
+
+    def dispatch_request(self, client_socket, addr, raw):
+        """
+        Dispatches one complete request from a peer, such as requesting the
+        peer list, adding or removing a peer, and broadcasts updates to all
+        subscribed peers.
+        PARAMETERS:
+        client_socket: This socket is used for communicating with the connected peer.
+        addr: Address of the connected peer(It's host and port)
+        raw: The complete request bytes.
+        """
+        ## The combined command carries a binary bitfield, so it is dispatched
+        ## on the raw bytes before any text decoding happens
+        if raw.startswith(b"ADD_PEER_AND_LIST"):
+            self.add_peer_and_list(client_socket, raw)
+            self.broadcast_peer_list()
+            return
+
+        data = raw.decode()
+
+        ## Handling different types of requests from the peer
+        if data == "REQUEST_PEERS":
+            ## sending the list, if the peer requests the list of other peers
+            self.send_peers_list(client_socket, addr)
+        elif data.startswith("ADD_PEER"):
+            ## if the peer wants to be added to the tracker, we update the list and broadcast to others
+            self.add_peer(client_socket, data)
+            self.broadcast_peer_list()
+        elif data.startswith("REMOVE_PEER"):
+            ## if the peers is removing itself, we update the list and broadcast to the others
+            self.remove_peer(client_socket, addr)
+            self.broadcast_peer_list()
+        else:
+            # Handle any unrecognized requests.
+            print(f"Unknown request from {addr}: {data}")
+
+    def disconnect_peer(self, client_socket, addr):
+        """
+        Drops a peer connection: unregisters it from the selector, closes the
+        socket and removes the peer from the tracker's tables.
+        PARAMETERS:
+        client_socket: The socket of the disconnecting peer.
+        addr: Address of the disconnecting peer.
+        """
+        try:
+            self.selector.unregister(client_socket)
+        except (KeyError, ValueError):
+            pass  # Already unregistered
+        self._recv_buffers.pop(client_socket, None)
+        # Close the socket connection with the peer.
+        client_socket.close()
+        # Removing the peer from the tracker, for ensuring it's no longer in the list.
+        self.remove_peer(None, addr)
+
+    def _get_peer_list_bytes(self):
+        """
+        Returns the encoded ASCII peer list, rebuilding it only when the peer
+        tables have changed since the last call (keyed by update_seq). All
+        REQUEST_PEERS replies and broadcasts between two mutations share the
+        same bytes object instead of re-running the O(peers x chunks) string
+        formatting every time.
+        RETURNS:
+        The peer list as bytes, or b"NO_PEERS" when the tracker is empty.
+        """
+        if self._peer_list_cache is None or self._peer_list_cache_seq != self.update_seq:
+            if self.peers:
+                # Formatting the peer list with the chunks the peers have;
+                # b"%d" formatting keeps the int-to-decimal loop in C instead
+                # of map(str, ...) creating a str object per chunk number
+                self._peer_list_cache = b"\n".join(
+                    [peer.encode() + b": " + b",".join([b"%d" % c for c in chunks])
+                     for peer, chunks in self.peers.items()])
+            else:
+                self._peer_list_cache = b"NO_PEERS"  # If no peers are available, inform the peer
+            self._peer_list_cache_seq = self.update_seq
+        return self._peer_list_cache
+
+    def _send_all(self, client_socket, payload, timeout=5.0):
+        """
+        Writes the whole payload to a non-blocking client socket. On a full
+        send buffer, send() writes only part of the payload (or raises
+        BlockingIOError); a truncated framed reply would leave the peer
+        blocked forever mid-frame, so the remainder is retried as soon as the
+        socket is writable again. A peer whose buffer stays full past the
+        timeout is treated as gone.
+        PARAMETERS:
+        client_socket: The non-blocking socket to write to.
+        payload: The complete reply bytes.
+        timeout: Seconds to wait for writability before giving up.
+        """
+        view = memoryview(payload)
+        deadline = monotonic() + timeout
+        while view:
+            try:
+                view = view[client_socket.send(view):]
+            except BlockingIOError:
+                remaining = deadline - monotonic()
+                if remaining <= 0 or not select.select([], [client_socket], [], remaining)[1]:
+                    raise ConnectionError("peer send buffer stayed full, dropping connection")
 
     def send_peers_list(self, client_socket, addr):
         """
@@ -91,41 +262,99 @@ class Tracker:
 
         """
         try:
-            if self.peers:
-                # Formatting the  peer list with the chunks the peers have
-                peer_list = "\n".join([f"{peer}: {','.join(map(str, chunks))}" for peer, chunks in self.peers.items()])
-            else:
-                peer_list = "NO_PEERS"  # If no peers are available, inform the peer
-            print(f"Sending peer list to {addr}: {peer_list}")
-            client_socket.send(peer_list.encode())
+            payload = self._get_peer_list_bytes()
+            log.debug("Sending peer list to %s (%d bytes)", addr, len(payload))
+            self._send_all(client_socket, payload)
         except Exception as e:
             print(f"Error sending peer list to {addr}: {e}")
 
+    def add_peer_and_list(self, client_socket, raw):
+        """
+        Handles the combined registration + peer-list command in one round
+        trip. The request is b"ADD_PEER_AND_LIST <addr> <seq>\\0<bitfield>"
+        where the bitfield marks the chunks the peer has and <seq> is the last
+        peer-list sequence the client saw; the reply is a uint32 sequence
+        followed by a binary framed peer list: a uint32 peer count, then per
+        peer a uint16-length-prefixed address and a uint32-length-prefixed
+        bitfield. When nothing changed since the client's sequence the count
+        is the PEERS_UNCHANGED sentinel and no list is encoded or sent, so
+        steady-state refresh polls cost a few bytes instead of a full
+        re-encode and reparse of every peer's chunks.
+        PARAMETERS:
+        client_socket: The socket used to communicate with the connected peer.
+        raw: The raw request bytes.
+        """
+        try:
+            header, _, bitfield = raw.partition(b"\0")
+            parts = header.decode().split(" ")
+            peer_ip = parts[1]
+            client_seq = int(parts[2]) if len(parts) > 2 else -1
+            # The compact bitfield bytes are the canonical record: change
+            # detection is a memcmp against the stored bytes, and decoding to
+            # a chunk-number list only happens when the announcement actually
+            # changed (steady-state refreshes decode nothing)
+            if self.peer_bitfields.get(peer_ip) != bitfield:
+                chunks = decode_bitfield(bitfield)
+                if peer_ip not in self.peers:
+                    log.debug("Peer %s with %d chunks added.", peer_ip, len(chunks))
+                self.peers[peer_ip] = chunks
+                # Keep the bitfield exactly as the peer encoded it, so replies
+                # can reuse it without a decode/re-encode round trip
+                self.peer_bitfields[peer_ip] = bytes(bitfield)
+                self.update_seq += 1
+            ## Peers using the combined command poll for the list on every
+            ## refresh, so they are not subscribed to the ASCII broadcasts;
+            ## an unsolicited broadcast would corrupt their framed replies.
+
+            if client_seq == self.update_seq:
+                self._send_all(client_socket, struct.pack(">II", self.update_seq, PEERS_UNCHANGED))
+                return
+            reply = bytearray(struct.pack(">II", self.update_seq, len(self.peers)))
+            for peer, peer_chunks in self.peers.items():
+                addr = peer.encode()
+                peer_bitfield = self.peer_bitfields.get(peer)
+                if peer_bitfield is None:
+                    # Legacy-registered peer: encode once and keep it
+                    peer_bitfield = self.peer_bitfields[peer] = encode_bitfield(peer_chunks)
+                reply += struct.pack(">H", len(addr)) + addr
+                reply += struct.pack(">I", len(peer_bitfield)) + peer_bitfield
+            self._send_all(client_socket, reply)
+        except Exception as e:
+            print(f"Error handling combined registration: {e}")
+            try:
+                self._send_all(client_socket, struct.pack(">II", self.update_seq, 0))
+            except OSError:
+                pass  # The peer is gone; the selector loop will reap the connection
+
     def add_peer(self, client_socket, data):
         """
         Adds a peer to the peer list and registers the chunks they have.
         Handles leechers (peers with no chunks) gracefully.
         """
         try:
-            parts = data.split(" ")
-            peer_ip = parts[1]
+            # Split off the command and address only, leaving the chunk ids as
+            # one tail string; str.split() on the tail plus map(int, ...) runs
+            # the whole parse in C instead of a per-element Python loop, which
+            # matters when a seeder announces tens of thousands of chunks
+            _, peer_ip, *tail = data.split(" ", 2)
             # If no chunks are provided, treat as an empty list (leecher)
-            if len(parts) > 2 and any(parts[2:]):
-                chunks = [int(x) for x in parts[2:] if x.strip()]
-            else:
-                chunks = []
+            chunks = list(map(int, tail[0].split())) if tail else []
             if peer_ip not in self.peers:
                 self.peers[peer_ip] = chunks
-                self.peer_connections[peer_ip] = client_socket
-                print(f"Peer {peer_ip} with chunks {chunks} added.")
-                client_socket.send("PEER_ADDED".encode())
+                self.peer_bitfields[peer_ip] = encode_bitfield(chunks)
+                self._subscribe_connection(peer_ip, client_socket)
+                self.update_seq += 1
+                log.debug("Peer %s with %d chunks added.", peer_ip, len(chunks))
+                self._send_all(client_socket, b"PEER_ADDED")
             else:
                 self.peers[peer_ip] = chunks
-                client_socket.send("PEER_UPDATED".encode())
-            print(f"Current list of peers: {self.peers}")
+                self.peer_bitfields[peer_ip] = encode_bitfield(chunks)
+                self.update_seq += 1
+                self._send_all(client_socket, b"PEER_UPDATED")
+            log.debug("Current list of peers: %s", self.peers)
         except Exception as e:
             print(f"Error adding peer: {e}")
-            client_socket.send("ERROR".encode())
+            self._send_all(client_socket, b"ERROR")
 
     def remove_peer(self, client_socket, addr):
         """
@@ -140,35 +369,83 @@ class Tracker:
             if peer_ip in self.peers:
                 ## Removing the Ip address of the peer from both the dictionaries.
                 del self.peers[peer_ip]
-                if peer_ip in self.peer_connections:
-                    del self.peer_connections[peer_ip]
-                print(f"Peer {peer_ip} removed.")
+                self.peer_bitfields.pop(peer_ip, None)
+                self._unsubscribe_connection(peer_ip)
+                self.update_seq += 1
+                log.debug("Peer %s removed.", peer_ip)
                 ## Informing that the client has been removed from the dictionaries.
                 if client_socket:
-                    client_socket.send("PEER_REMOVED".encode())
+                    self._send_all(client_socket, b"PEER_REMOVED")
             else:
                 ## Edge case for handling if the peer is not found
                 if client_socket:
-                    client_socket.send("PEER_NOT_FOUND".encode())
+                    self._send_all(client_socket, b"PEER_NOT_FOUND")
         except Exception as e:
             print(f"Error removing peer {addr}: {e}")
 
+    def _subscribe_connection(self, peer_ip, client_socket):
+        """
+        Adds a broadcast subscriber into the connection slab, reusing a freed
+        slot when one is available.
+        PARAMETERS:
+        peer_ip: Address key of the subscribing peer.
+        client_socket: The peer's connection to receive broadcasts on.
+        """
+        existing = self._conn_index.get(peer_ip)
+        if existing is not None:
+            self._conn_slots[existing] = (peer_ip, client_socket)
+            return
+        if self._free_slots:
+            index = self._free_slots.pop()
+            self._conn_slots[index] = (peer_ip, client_socket)
+        else:
+            index = len(self._conn_slots)
+            self._conn_slots.append((peer_ip, client_socket))
+        self._conn_index[peer_ip] = index
+
+    def _unsubscribe_connection(self, peer_ip):
+        """
+        Frees a subscriber's slab slot so a later join can reuse it.
+        PARAMETERS:
+        peer_ip: Address key of the departing peer.
+        """
+        index = self._conn_index.pop(peer_ip, None)
+        if index is not None:
+            self._conn_slots[index] = None
+            self._free_slots.append(index)
+
     def broadcast_peer_list(self):
         """
-        Broadcasts the updated peer list and their 
+        Broadcasts the updated peer list and their
         chunks to all connected peers.
 
         """
-        # Create a formatted string of all peers and their chunks.
-        peer_list = "\n".join([f"{peer}: {','.join(map(str, chunks))}" for peer, chunks in self.peers.items()])
-        for peer, connection in self.peer_connections.items():
+        if not self._conn_index:
+            return  # Nobody subscribed to broadcasts, skip formatting entirely
+        # Every connection sends the same cached immutable payload; the
+        # formatting only re-runs when the peer tables actually changed.
+        # The slab walk is a straight pass over a dense list with a None
+        # check per slot, no dict iteration involved.
+        # One memoryview over the cached payload is shared by every send, so
+        # each connection writes from the same pinned backing buffer and no
+        # per-peer copy or re-encode ever happens.
+        payload = memoryview(self._get_peer_list_bytes())
+        dead_peers = []
+        for slot in self._conn_slots:
+            if slot is None:
+                continue  # Vacated slot awaiting reuse
+            peer, connection = slot
             try:
                 # Send the updated peer list to each connected peer.
-                print(f"Broadcasting updated peer list to {peer}: {peer_list}")
-                connection.send(peer_list.encode())
+                log.debug("Broadcasting updated peer list to %s", peer)
+                self._send_all(connection, payload)
             except Exception as e:
-                # Handle any errors that occur during broadcasting.
+                # A failed send means the connection is gone; drop it so the
+                # next broadcast does not waste a syscall on it.
                 print(f"Error broadcasting to {peer}: {e}")
+                dead_peers.append(peer)
+        for peer in dead_peers:
+            self._unsubscribe_connection(peer)
 
 if __name__ == "__main__":
     ## Started an instance of the tracker class